@@ -11,7 +11,7 @@ import { supabase } from '@/lib/supabase'
 import { STRIPE_PLANS } from '@/lib/stripe'
 import { formatDate, formatFileSize } from '@/lib/utils'
 import { Job, OutputFile } from '@/types/database'
-import { Upload, Download, Clock, CheckCircle, AlertCircle, Loader2, Plus } from 'lucide-react'
+import { Upload, Download, Clock, CheckCircle, AlertCircle, Loader2, Plus, XCircle } from 'lucide-react'
 import { toast } from '@/hooks/use-toast'
 
 export default function DashboardPage() {
@@ -55,6 +55,8 @@ export default function DashboardPage() {
         return <Loader2 className="w-4 h-4 text-blue-600 animate-spin" />
       case 'failed':
         return <AlertCircle className="w-4 h-4 text-red-600" />
+      case 'canceled':
+        return <XCircle className="w-4 h-4 text-gray-500" />
       default:
         return <Clock className="w-4 h-4 text-yellow-600" />
     }
@@ -68,6 +70,8 @@ export default function DashboardPage() {
         return 'bg-blue-100 text-blue-800'
       case 'failed':
         return 'bg-red-100 text-red-800'
+      case 'canceled':
+        return 'bg-gray-100 text-gray-800'
       default:
         return 'bg-yellow-100 text-yellow-800'
     }
@@ -14,7 +14,7 @@ export interface User {
 export interface Job {
   id: string
   user_id: string
-  status: 'pending' | 'processing' | 'completed' | 'failed'
+  status: 'pending' | 'processing' | 'completed' | 'failed' | 'canceled'
   priority: boolean
   input_file_path: string
   input_file_name: string
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Batch Text to Embroidery Conversion
+This module converts a manifest of text designs offline, spreading the work
+across all cores and checkpointing progress so interrupted runs can resume.
+
+Usage:
+    python batch.py manifest.jsonl --output-dir output [--workers N] [--checkpoint FILE]
+
+The manifest holds one JSON object per line with the TextEmbroideryRequest
+fields, plus an optional "id" and "font".
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional, Set, Tuple
+
+from text_embroidery import TextEmbroideryConverter, TextEmbroideryRequest
+
+CHECKPOINT_FILENAME = ".checkpoint"
+DEFAULT_CHUNKSIZE = 16
+
+# mkstemp creates owner-only files; give outputs the mode a plain open() would
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+_converter: Optional[TextEmbroideryConverter] = None
+_output_dir = ""
+
+def read_manifest(path: str) -> Iterator[dict]:
+    """Yield jobs from a JSON-lines manifest, defaulting ids to the line number.
+
+    Invalid lines are yielded as {"id", "error"} so one bad line never stops the run.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                job = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield {"id": str(line_number), "error": f"line {line_number}: invalid JSON: {e}"}
+                continue
+            if not isinstance(job, dict) or "text" not in job:
+                yield {"id": str(line_number), "error": f"line {line_number}: missing \"text\""}
+                continue
+            job["id"] = str(job.get("id", line_number))
+            yield job
+
+def read_checkpoint(path: str) -> Set[str]:
+    """Return the ids of jobs completed by previous runs."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, 'r', encoding='utf-8') as f:
+        return {line.strip() for line in f if line.strip()}
+
+def write_atomic(path: str, content: bytes) -> None:
+    """Write a file so readers never see a partial result."""
+    directory = os.path.dirname(path)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        os.fchmod(fd, 0o666 & ~_UMASK)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+def _init_worker(output_dir: str) -> None:
+    global _converter, _output_dir
+    _converter = TextEmbroideryConverter()
+    _output_dir = output_dir
+
+def convert_job(job: dict) -> Tuple[str, int, Optional[str]]:
+    """Convert one manifest job and write its files; returns (id, files written, error)."""
+    try:
+        # The converter is reused across jobs, so an unknown font must not fall back to the previous one
+        font = job.get("font") or "default"
+        if not _converter.set_font(font):
+            return job["id"], 0, f"unknown font: {font}"
+        request = TextEmbroideryRequest(
+            text=job["text"],
+            shape=job.get("shape", "line"),
+            units=job.get("units", "mm"),
+            line_length=job.get("line_length"),
+            circle_radius=job.get("circle_radius"),
+            output_formats=job.get("output_formats", ["DST"])
+        )
+        files = _converter.convert_text_to_embroidery(request)
+        if len(files) != len(request.output_formats):
+            # The converter skips formats it failed to encode; retry the whole job next run
+            generated = {file.format for file in files}
+            missing = [format_name for format_name in request.output_formats if format_name not in generated]
+            return job["id"], 0, f"failed to generate {', '.join(missing) or 'all formats'}"
+
+        job_dir = os.path.join(_output_dir, re.sub(r"[^A-Za-z0-9._-]", "_", job["id"]))
+        os.makedirs(job_dir, exist_ok=True)
+        for file in files:
+            write_atomic(os.path.join(job_dir, os.path.basename(file.filename)), file.content)
+        return job["id"], len(files), None
+    except Exception as e:
+        return job["id"], 0, str(e)
+
+def run_batch(manifest: str, output_dir: str, workers: Optional[int] = None,
+              checkpoint: Optional[str] = None) -> Tuple[int, int, int]:
+    """Convert every pending manifest job; returns (converted, skipped, failed) counts."""
+    os.makedirs(output_dir, exist_ok=True)
+    checkpoint = checkpoint or os.path.join(output_dir, CHECKPOINT_FILENAME)
+    done = read_checkpoint(checkpoint)
+
+    skipped = failed = 0
+    def pending() -> Iterator[dict]:
+        nonlocal skipped, failed
+        for job in read_manifest(manifest):
+            if "error" in job:
+                failed += 1
+                print(f"❌ {job['error']}", file=sys.stderr)
+            elif job["id"] in done:
+                skipped += 1
+            else:
+                yield job
+
+    converted = 0
+    with open(checkpoint, 'a', encoding='utf-8') as log, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(output_dir,)) as pool:
+        for job_id, file_count, error in pool.map(convert_job, pending(), chunksize=DEFAULT_CHUNKSIZE):
+            if error:
+                failed += 1
+                print(f"❌ {job_id}: {error}", file=sys.stderr)
+                continue
+            converted += 1
+            # Record each finished job immediately so a crash loses at most in-flight work
+            log.write(f"{job_id}\n")
+            log.flush()
+
+    return converted, skipped, failed
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Convert a manifest of text designs to embroidery files.")
+    parser.add_argument("manifest", help="JSON-lines file with one design per line")
+    parser.add_argument("--output-dir", default="output", help="directory for generated files")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--checkpoint", default=None, help=f"progress file (default: <output-dir>/{CHECKPOINT_FILENAME})")
+    args = parser.parse_args(argv)
+
+    converted, skipped, failed = run_batch(args.manifest, args.output_dir, args.workers, args.checkpoint)
+    print(f"🎯 Converted {converted}, skipped {skipped} already done, {failed} failed")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
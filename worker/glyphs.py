@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Glyph Centerlines
+This module defines single-stroke centerlines for lettering. Coordinates are in
+a unit box with x to the right and y downwards, matching the stitch layout.
+"""
+
+import math
+from typing import Dict, List, Tuple
+
+Stroke = List[Tuple[float, float]]
+
+def _arc(cx: float, cy: float, rx: float, ry: float, start: float, end: float, steps: int = 12) -> Stroke:
+    """Sample an elliptical arc; angles are in degrees, counter-clockwise as drawn."""
+    points = []
+    for i in range(steps + 1):
+        angle = math.radians(start + (end - start) * i / steps)
+        points.append((cx + rx * math.cos(angle), cy - ry * math.sin(angle)))
+    return points
+
+_RING = _arc(0.5, 0.5, 0.5, 0.5, 90, 450, 16)
+_P_BOWL = [(0, 1), (0, 0), (0.7, 0), (1, 0.15), (1, 0.4), (0.7, 0.55), (0, 0.55)]
+
+GLYPHS: Dict[str, List[Stroke]] = {
+    "A": [[(0, 1), (0.5, 0), (1, 1)], [(0.2, 0.6), (0.8, 0.6)]],
+    "B": [[(0, 1), (0, 0), (0.7, 0), (0.9, 0.12), (0.9, 0.38), (0.7, 0.5), (0, 0.5)],
+          [(0.7, 0.5), (1, 0.62), (1, 0.88), (0.75, 1), (0, 1)]],
+    "C": [_arc(0.5, 0.5, 0.5, 0.5, 45, 315)],
+    "D": [[(0, 0), (0.55, 0), (0.9, 0.25), (1, 0.5), (0.9, 0.75), (0.55, 1), (0, 1), (0, 0)]],
+    "E": [[(1, 0), (0, 0), (0, 1), (1, 1)], [(0, 0.5), (0.75, 0.5)]],
+    "F": [[(1, 0), (0, 0), (0, 1)], [(0, 0.5), (0.75, 0.5)]],
+    "G": [_arc(0.5, 0.5, 0.5, 0.5, 45, 360) + [(0.55, 0.5)]],
+    "H": [[(0, 0), (0, 1)], [(1, 0), (1, 1)], [(0, 0.5), (1, 0.5)]],
+    "I": [[(0.5, 0), (0.5, 1)], [(0.2, 0), (0.8, 0)], [(0.2, 1), (0.8, 1)]],
+    "J": [[(1, 0)] + _arc(0.5, 0.7, 0.5, 0.3, 0, -180)],
+    "K": [[(0, 0), (0, 1)], [(1, 0), (0, 0.6)], [(0.3, 0.4), (1, 1)]],
+    "L": [[(0, 0), (0, 1), (1, 1)]],
+    "M": [[(0, 1), (0, 0), (0.5, 0.6), (1, 0), (1, 1)]],
+    "N": [[(0, 1), (0, 0), (1, 1), (1, 0)]],
+    "O": [_RING],
+    "P": [_P_BOWL],
+    "Q": [_RING, [(0.6, 0.7), (1, 1)]],
+    "R": [_P_BOWL, [(0.5, 0.55), (1, 1)]],
+    "S": [[(1, 0.1), (0.8, 0), (0.2, 0), (0, 0.15), (0, 0.35), (0.2, 0.5), (0.8, 0.5),
+           (1, 0.65), (1, 0.85), (0.8, 1), (0.2, 1), (0, 0.9)]],
+    "T": [[(0, 0), (1, 0)], [(0.5, 0), (0.5, 1)]],
+    "U": [[(0, 0)] + _arc(0.5, 0.6, 0.5, 0.4, 180, 360) + [(1, 0)]],
+    "V": [[(0, 0), (0.5, 1), (1, 0)]],
+    "W": [[(0, 0), (0.25, 1), (0.5, 0.4), (0.75, 1), (1, 0)]],
+    "X": [[(0, 0), (1, 1)], [(1, 0), (0, 1)]],
+    "Y": [[(0, 0), (0.5, 0.5), (1, 0)], [(0.5, 0.5), (0.5, 1)]],
+    "Z": [[(0, 0), (1, 0), (0, 1), (1, 1)]],
+    "0": [_arc(0.5, 0.5, 0.4, 0.5, 90, 450, 16)],
+    "1": [[(0.25, 0.2), (0.5, 0), (0.5, 1)], [(0.2, 1), (0.8, 1)]],
+    "2": [_arc(0.5, 0.3, 0.45, 0.3, 160, -20) + [(0, 1), (1, 1)]],
+    "3": [_arc(0.5, 0.27, 0.45, 0.25, 150, -90) + _arc(0.5, 0.73, 0.45, 0.25, 90, -150)],
+    "4": [[(0.75, 1), (0.75, 0), (0, 0.7), (1, 0.7)]],
+    "5": [[(1, 0), (0.1, 0), (0.12, 0.45)] + _arc(0.5, 0.68, 0.5, 0.32, 140, -150)],
+    "6": [[(0.9, 0), (0.3, 0.2), (0.05, 0.6)] + _arc(0.5, 0.68, 0.45, 0.32, 180, 540, 16)],
+    "7": [[(0, 0), (1, 0), (0.35, 1)]],
+    "8": [_arc(0.5, 0.27, 0.4, 0.25, 270, 630) + _arc(0.5, 0.74, 0.48, 0.26, 90, 450)],
+    "9": [_arc(0.5, 0.32, 0.45, 0.32, 0, 360) + [(0.7, 0.8), (0.1, 1)]],
+}
+
+# Unknown characters fall back to a box, like the block font
+FALLBACK_GLYPH: List[Stroke] = [[(0, 0), (1, 0), (1, 1), (0, 1), (0, 0)]]
+
+def glyph_strokes(char: str) -> List[Stroke]:
+    """Return the unit-box centerline strokes for a character."""
+    if char.isspace():
+        return []
+    return GLYPHS.get(char.upper(), FALLBACK_GLYPH)
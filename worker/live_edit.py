@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Live Text Editing
+This module keeps the character layout of a text design between edits. Glyphs
+are cached in cell-relative form, so characters that only shift or resize are
+moved with an affine transform and only new glyphs are generated.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from text_embroidery import TextEmbroideryConverter, TextEmbroideryRequest
+
+MAX_TEMPLATE_CACHE_BYTES = 128 * 1024  # Per session; satin templates are a few KB each
+
+def _apply_transform(transform: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """Map points through a 2x3 affine transform."""
+    return points @ transform[:, :2].T + transform[:, 2]
+
+def _relative_transform(new: np.ndarray, old: np.ndarray) -> np.ndarray:
+    """Return the transform taking stitches placed by `old` to their place under `new`."""
+    homogeneous = np.array([0.0, 0.0, 1.0])
+    return (np.vstack((new, homogeneous)) @ np.linalg.inv(np.vstack((old, homogeneous))))[:2]
+
+@dataclass
+class StitchDelta:
+    revision: int
+    width: float
+    height: float
+    character_count: int  # Segments beyond this index were removed
+    changed: Dict[int, List[List[float]]] = field(default_factory=dict)
+    moved: Dict[int, List[float]] = field(default_factory=dict)  # Affine [a, b, c, d, e, f] for existing segments
+    recomputed: int = 0  # Glyph templates generated rather than reused
+
+class LiveEditSession:
+    """Holds the previous layout and per-character stitches of one editing session.
+
+    Deltas describe the raw per-character stitch segments (raw_stitches());
+    the sewn output is those segments joined and simplified (stitches()).
+    """
+
+    def __init__(self, max_cache_bytes: int = MAX_TEMPLATE_CACHE_BYTES):
+        self.max_cache_bytes = max_cache_bytes
+        self.converter = TextEmbroideryConverter()
+        self.latest_revision = 0
+        self.applied_revision = 0
+        self._style: Optional[Tuple[str, str]] = None
+        self._templates: List[Tuple] = []
+        self._transforms: List[np.ndarray] = []
+        self._segments: List[np.ndarray] = []
+        self._cache: "OrderedDict[Tuple, np.ndarray]" = OrderedDict()
+        self._cache_bytes = 0
+
+    def submit(self, revision: int) -> bool:
+        """Register an incoming edit; returns False if a newer edit already arrived."""
+        if revision <= self.latest_revision:
+            return False
+        self.latest_revision = revision
+        return True
+
+    def is_superseded(self, revision: int) -> bool:
+        """Check whether a newer edit was submitted after this one."""
+        return revision != self.latest_revision
+
+    def _template_stitches(self, shape: str, template: Tuple, delta: StitchDelta) -> np.ndarray:
+        key = self._style + template
+        stitches = self._cache.get(key)
+        if stitches is None:
+            stitches = np.asarray(self.converter.character_stitches(shape, template), dtype=float).reshape(-1, 2)
+            delta.recomputed += 1
+            self._cache[key] = stitches
+            self._cache_bytes += stitches.nbytes
+            # Bound memory rather than entry count: satin templates are sized in
+            # millimetres, so a fixed line length yields new ones on every keystroke
+            while self._cache_bytes > self.max_cache_bytes and len(self._cache) > 1:
+                self._cache_bytes -= self._cache.popitem(last=False)[1].nbytes
+        else:
+            self._cache.move_to_end(key)
+        return stitches
+
+    def apply(self, request: TextEmbroideryRequest, font: str, revision: int) -> StitchDelta:
+        """Update the layout and return the segments that changed or moved.
+
+        Raises ValueError for an unknown font, leaving the session unchanged.
+        """
+        if not self.converter.set_font(font):
+            raise ValueError(f"Unknown font: {font}")
+        width, height = self.converter.design_size(request)
+        placements = self.converter.layout_characters(request.text, request.shape, width, height)
+
+        # A different shape or font invalidates every previous segment
+        style = (request.shape, self.converter.get_current_font())
+        if style != self._style:
+            self._style = style
+            self._templates, self._transforms, self._segments = [], [], []
+
+        delta = StitchDelta(revision=revision, width=width, height=height, character_count=len(placements))
+        templates, transforms, segments = [], [], []
+        for index, placement in enumerate(placements):
+            template, transform = self.converter.character_template(request.shape, placement)
+            same_glyph = index < len(self._templates) and self._templates[index] == template
+
+            if same_glyph and np.array_equal(self._transforms[index], transform):
+                segment = self._segments[index]
+            else:
+                segment = _apply_transform(transform, self._template_stitches(request.shape, template, delta))
+                if same_glyph:
+                    # The client already has this glyph; send only how it moved
+                    delta.moved[index] = _relative_transform(transform, self._transforms[index]).ravel().tolist()
+                else:
+                    delta.changed[index] = segment.tolist()
+
+            templates.append(template)
+            transforms.append(transform)
+            segments.append(segment)
+
+        self._templates, self._transforms, self._segments = templates, transforms, segments
+        self.applied_revision = revision
+        return delta
+
+    def raw_stitches(self) -> List[Tuple[float, float]]:
+        """Return the joined per-character segments, as described by the deltas."""
+        return [tuple(point) for segment in self._segments for point in segment.tolist()]
+
+    def stitches(self) -> List[Tuple[float, float]]:
+        """Return the simplified stitch list that a full conversion would sew."""
+        return self.converter.simplify_plan_stitches(self.raw_stitches())[0]
@@ -6,12 +6,21 @@ import redis
 import json
 import os
 import asyncio
+from datetime import datetime, timezone
 from typing import List, Optional
 import logging
 import base64
+import random
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import asdict
 
 # Import our text embroidery converter
-from text_embroidery import TextEmbroideryConverter, TextEmbroideryRequest
+from text_embroidery import TextEmbroideryConverter, TextEmbroideryRequest, ResultCache, request_cache_key
+from profiling import SamplingProfiler
+from live_edit import LiveEditSession
+from preview import render_png, render_svg, PREVIEW_PX_PER_MM, LOW_RES_PX_PER_MM
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -25,12 +34,21 @@ REDIS_URL = os.getenv("REDIS_URL")
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 WORKER_API_KEY = os.getenv("WORKER_API_API_KEY")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))  # Fraction of requests to profile
+PROFILE_MAX_STORED = int(os.getenv("PROFILE_MAX_STORED", "100"))
+PROFILE_TTL = 7 * 24 * 60 * 60  # seconds
+LIVE_EDIT_COALESCE_SECONDS = float(os.getenv("LIVE_EDIT_COALESCE_MS", "50")) / 1000
+LIVE_EDIT_MAX_SESSIONS = int(os.getenv("LIVE_EDIT_MAX_SESSIONS", "1000"))
+LIVE_EDIT_TEMPLATE_CACHE_BYTES = int(os.getenv("LIVE_EDIT_TEMPLATE_CACHE_KB", "128")) * 1024  # Per session
 
 # Security
 security = HTTPBearer()
 
 # Initialize text embroidery converter
 text_converter = TextEmbroideryConverter()
+preview_cache = ResultCache(max_entries=int(os.getenv("PREVIEW_CACHE_SIZE", "512")))
+file_cache = ResultCache(max_entries=int(os.getenv("FILE_CACHE_SIZE", "256")))
+live_sessions: "OrderedDict[str, LiveEditSession]" = OrderedDict()
 
 # Models
 class JobRequest(BaseModel):
@@ -38,6 +56,7 @@ class JobRequest(BaseModel):
     input_file_path: str
     output_formats: List[str]
     priority: bool = False
+    deadline: Optional[datetime] = None  # Drop the job if it has not finished by then
 
 class TextEmbroideryRequestModel(BaseModel):
     text: str
@@ -48,6 +67,24 @@ class TextEmbroideryRequestModel(BaseModel):
     output_formats: List[str]
     font: Optional[str] = "default"  # Font selection
 
+class TextDesignModel(BaseModel):
+    text: str
+    shape: str  # 'line' or 'circle'
+    units: str  # 'mm' or 'inches'
+    line_length: Optional[float] = None
+    circle_radius: Optional[float] = None
+    font: Optional[str] = "default"
+
+class TextPreviewRequestModel(TextDesignModel):
+    format: str = "png"  # 'png' or 'svg'
+    progressive: bool = False  # Return a low-resolution PNG for instant display
+
+class LiveEditModel(TextDesignModel):
+    revision: int  # Increases with every edit in the session
+
+class TextEstimateBatchModel(BaseModel):
+    designs: List[TextDesignModel]
+
 class JobStatus(BaseModel):
     job_id: str
     status: str
@@ -55,6 +92,12 @@ class JobStatus(BaseModel):
     message: str
     output_files: Optional[List[dict]] = None
 
+class JobCancelled(Exception):
+    """Raised at a pipeline checkpoint when a job was cancelled or missed its deadline"""
+
+CANCEL_KEY_PREFIX = "job_cancel:"
+CANCEL_KEY_TTL = 24 * 60 * 60  # seconds
+
 # Database connection
 def get_db_connection():
     try:
@@ -84,17 +127,144 @@ async def verify_api_key(authorization: str = Header(None)):
     
     return token
 
+def deadline_passed(job_request: JobRequest) -> bool:
+    """Check whether the job's optional deadline has already passed"""
+    if job_request.deadline is None:
+        return False
+    deadline = job_request.deadline
+    if deadline.tzinfo is None:
+        deadline = deadline.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) >= deadline
+
+def job_redis_connection(job_request: JobRequest) -> Optional[redis.Redis]:
+    """Open the Redis client a job reuses for its cancellation checks"""
+    try:
+        return get_redis_connection()
+    except Exception as e:
+        logger.warning(f"Redis unavailable for job {job_request.job_id}, cancellation disabled: {e}")
+        return None
+
+async def check_job_active(job_request: JobRequest, r: Optional[redis.Redis]):
+    """Cooperative cancellation checkpoint, called between pipeline stages"""
+    if deadline_passed(job_request):
+        raise JobCancelled("Job deadline exceeded")
+    if r is None:
+        return
+    
+    try:
+        # Keep the blocking Redis round trip off the event loop
+        cancelled = await asyncio.to_thread(r.exists, f"{CANCEL_KEY_PREFIX}{job_request.job_id}")
+    except Exception as e:
+        # Keep processing if Redis is unavailable; the job can still be cancelled later
+        logger.warning(f"Could not check cancellation for job {job_request.job_id}: {e}")
+        return
+    
+    if cancelled:
+        raise JobCancelled("Job cancelled")
+
+def mark_job_canceled(job_request: JobRequest, reason: str, r: Optional[redis.Redis]):
+    """Record a cancelled job and release its processing slot"""
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            UPDATE jobs 
+            SET status = 'canceled', 
+                error_message = %s 
+            WHERE id = %s AND status IN ('pending', 'processing', 'canceled')
+        """, (reason, job_request.job_id))
+        
+        conn.commit()
+        cursor.close()
+        conn.close()
+    except Exception as update_error:
+        logger.error(f"Failed to update job status: {update_error}")
+    
+    if r is None:
+        return
+    try:
+        r.lrem("processing_jobs", 0, job_request.job_id)
+        r.delete(f"{CANCEL_KEY_PREFIX}{job_request.job_id}")
+    except Exception as e:
+        logger.warning(f"Failed to release job {job_request.job_id} from Redis: {e}")
+
+def should_profile(x_profile: Optional[str]) -> bool:
+    """Decide whether to profile a request from the X-Profile header or the sampling rate"""
+    if x_profile is not None:
+        return x_profile.lower() in ("1", "true", "yes")
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+def store_profile(endpoint: str, metadata: dict, report: dict):
+    """Save a captured profile in Redis, keeping only the most recent ones"""
+    profile_id = uuid.uuid4().hex
+    profile = {
+        "id": profile_id,
+        "endpoint": endpoint,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "metadata": metadata,
+        **report
+    }
+    try:
+        r = get_redis_connection()
+        r.set(f"profile:{profile_id}", json.dumps(profile), ex=PROFILE_TTL)
+        r.lpush("profiles", profile_id)
+        r.ltrim("profiles", 0, PROFILE_MAX_STORED - 1)
+        logger.info(f"Stored profile {profile_id} for {endpoint}")
+    except Exception as e:
+        logger.warning(f"Failed to store profile for {endpoint}: {e}")
+
+@contextmanager
+def maybe_profile(enabled: bool, endpoint: str, metadata: dict):
+    """Run the wrapped block under the sampling profiler when enabled"""
+    if not enabled:
+        yield
+        return
+    
+    # Attribute samples to the current request's task, not the whole event loop
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    scope_frame = getattr(task.get_coro(), "cr_frame", None) if task else None
+    
+    profiler = SamplingProfiler(scope_frame=scope_frame)
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        store_profile(endpoint, metadata, profiler.report())
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "threadmaster-worker"}
 
 @app.post("/process-job", dependencies=[Depends(verify_api_key)])
-async def process_job(job_request: JobRequest):
+async def process_job(job_request: JobRequest, x_profile: Optional[str] = Header(None)):
     """Process an embroidery digitization job"""
+    metadata = {
+        "job_id": job_request.job_id,
+        "output_formats": job_request.output_formats,
+        "priority": job_request.priority
+    }
+    r = job_redis_connection(job_request)
+    try:
+        with maybe_profile(should_profile(x_profile), "process-job", metadata):
+            return await run_job(job_request, r)
+    finally:
+        if r is not None:
+            r.close()
+
+async def run_job(job_request: JobRequest, r: Optional[redis.Redis]):
+    """Run the digitization pipeline for a job and record the outcome"""
     try:
         logger.info(f"Processing job: {job_request.job_id}")
         
+        # Drop queued work that was cancelled or expired before it started
+        await check_job_active(job_request, r)
+        
         # Update job status to processing
         conn = get_db_connection()
         cursor = conn.cursor()
@@ -102,15 +272,20 @@ async def process_job(job_request: JobRequest):
         cursor.execute("""
             UPDATE jobs 
             SET status = 'processing', processing_started_at = NOW() 
-            WHERE id = %s
+            WHERE id = %s AND status != 'canceled'
         """, (job_request.job_id,))
         
+        # No matching row means the job was cancelled even if the Redis signal never arrived
+        started = cursor.rowcount
         conn.commit()
         cursor.close()
         conn.close()
+        if not started:
+            raise JobCancelled("Job cancelled")
         
         # Simulate processing (replace with actual digitization logic)
-        await simulate_digitization(job_request)
+        await simulate_digitization(job_request, r)
+        await check_job_active(job_request, r)
         
         # Update job as completed
         conn = get_db_connection()
@@ -132,12 +307,16 @@ async def process_job(job_request: JobRequest):
             SET status = 'completed', 
                 output_files = %s,
                 completed_at = NOW() 
-            WHERE id = %s
+            WHERE id = %s AND status != 'canceled'
         """, (json.dumps(output_files), job_request.job_id))
         
+        # A cancel can land after the last checkpoint; never report that job as completed
+        completed = cursor.rowcount
         conn.commit()
         cursor.close()
         conn.close()
+        if not completed:
+            raise JobCancelled("Job cancelled")
         
         logger.info(f"Job {job_request.job_id} completed successfully")
         
@@ -148,6 +327,17 @@ async def process_job(job_request: JobRequest):
             "output_files": output_files
         }
         
+    except JobCancelled as e:
+        logger.info(f"Job {job_request.job_id} stopped: {e}")
+        mark_job_canceled(job_request, str(e), r)
+        
+        return {
+            "success": False,
+            "job_id": job_request.job_id,
+            "status": "canceled",
+            "message": str(e)
+        }
+        
     except Exception as e:
         logger.error(f"Error processing job {job_request.job_id}: {e}")
         
@@ -171,7 +361,7 @@ async def process_job(job_request: JobRequest):
         
         raise HTTPException(status_code=500, detail=f"Job processing failed: {str(e)}")
 
-async def simulate_digitization(job_request: JobRequest):
+async def simulate_digitization(job_request: JobRequest, r: Optional[redis.Redis] = None):
     """Simulate embroidery digitization process"""
     # In production, this would use Ink/Stitch or libembroidery
     logger.info(f"Starting digitization for job {job_request.job_id}")
@@ -181,12 +371,62 @@ async def simulate_digitization(job_request: JobRequest):
     processing_time = base_time + len(job_request.output_formats) * 2
     
     for i in range(processing_time):
+        await check_job_active(job_request, r)
         await asyncio.sleep(1)
         progress = int((i + 1) / processing_time * 100)
         logger.info(f"Job {job_request.job_id} progress: {progress}%")
     
     logger.info(f"Digitization completed for job {job_request.job_id}")
 
+@app.post("/cancel-job/{job_id}", dependencies=[Depends(verify_api_key)])
+async def cancel_job(job_id: str):
+    """Cancel a pending or running job"""
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            UPDATE jobs 
+            SET status = 'canceled', 
+                error_message = 'Job cancelled' 
+            WHERE id = %s AND status IN ('pending', 'processing')
+            RETURNING id
+        """, (job_id,))
+        
+        updated = cursor.fetchone()
+        conn.commit()
+        cursor.close()
+        conn.close()
+        
+        if not updated:
+            raise HTTPException(status_code=409, detail="Job not found or already finished")
+        
+        response = {
+            "success": True,
+            "job_id": job_id,
+            "status": "canceled"
+        }
+        
+        # Signal the running task and drop the job if it is still queued. The job is
+        # already canceled in the database, which a running task checks before completing.
+        try:
+            r = get_redis_connection()
+            r.set(f"{CANCEL_KEY_PREFIX}{job_id}", 1, ex=CANCEL_KEY_TTL)
+            r.lrem("job_queue", 0, job_id)
+        except Exception as e:
+            logger.warning(f"Job {job_id} cancelled but not signalled through Redis: {e}")
+            response["warning"] = "Cancellation recorded; a running job stops at its next status update"
+        
+        logger.info(f"Job {job_id} cancelled")
+        
+        return response
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error cancelling job {job_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to cancel job")
+
 @app.get("/job-status/{job_id}", dependencies=[Depends(verify_api_key)])
 async def get_job_status(job_id: str):
     """Get the status of a specific job"""
@@ -243,38 +483,59 @@ async def get_queue_status():
         logger.error(f"Error getting queue status: {e}")
         raise HTTPException(status_code=500, detail="Failed to get queue status")
 
+def converter_for_font(font: Optional[str]) -> TextEmbroideryConverter:
+    """Create a converter for one request so its font never leaks into other requests"""
+    converter = TextEmbroideryConverter()
+    if not converter.set_font(font or "default"):
+        raise HTTPException(status_code=400, detail=f"Unknown font: {font}")
+    return converter
+
+def generate_files(converter: TextEmbroideryConverter, request: TextEmbroideryRequest) -> list:
+    """Generate embroidery files, reusing cached formats for the same request key"""
+    cache_key = request_cache_key(request, converter.get_current_font())
+    files = {format_name: file_cache.get((cache_key, format_name.upper())) for format_name in request.output_formats}
+    
+    missing = [format_name for format_name, file in files.items() if file is None]
+    if missing:
+        request.output_formats = missing
+        for file in converter.convert_text_to_embroidery(request):
+            file_cache.put((cache_key, file.format.upper()), file)
+            files[file.format] = file
+    
+    return [file for file in files.values() if file is not None]
+
 @app.post("/text-to-embroidery", dependencies=[Depends(verify_api_key)])
-async def convert_text_to_embroidery(request: TextEmbroideryRequestModel):
+async def convert_text_to_embroidery(request: TextEmbroideryRequestModel, x_profile: Optional[str] = Header(None)):
     """Convert text to embroidery files"""
     try:
         logger.info(f"Converting text to embroidery: '{request.text}'")
         
-        # Set font if specified
-        if request.font and request.font != "default":
-            text_converter.set_font(request.font)
-        
-        # Convert to internal format
-        internal_request = TextEmbroideryRequest(
-            text=request.text,
-            shape=request.shape,
-            units=request.units,
-            line_length=request.line_length,
-            circle_radius=request.circle_radius,
-            output_formats=request.output_formats
-        )
-        
-        # Generate embroidery files
-        files = text_converter.convert_text_to_embroidery(internal_request)
-        
-        # Convert to response format
-        response_files = []
-        for file in files:
-            response_files.append({
-                "format": file.format,
-                "content": base64.b64encode(file.content).decode('utf-8'),
-                "filename": file.filename,
-                "size": len(file.content)
-            })
+        metadata = request.model_dump()
+        with maybe_profile(should_profile(x_profile), "text-to-embroidery", metadata):
+            converter = converter_for_font(request.font)
+            
+            # Convert to internal format
+            internal_request = TextEmbroideryRequest(
+                text=request.text,
+                shape=request.shape,
+                units=request.units,
+                line_length=request.line_length,
+                circle_radius=request.circle_radius,
+                output_formats=request.output_formats
+            )
+            
+            # Generate embroidery files
+            files = generate_files(converter, internal_request)
+            
+            # Convert to response format
+            response_files = []
+            for file in files:
+                response_files.append({
+                    "format": file.format,
+                    "content": base64.b64encode(file.content).decode('utf-8'),
+                    "filename": file.filename,
+                    "size": len(file.content)
+                })
         
         logger.info(f"Successfully generated {len(files)} embroidery files for text '{request.text}'")
         
@@ -287,10 +548,182 @@ async def convert_text_to_embroidery(request: TextEmbroideryRequestModel):
             "message": f"Successfully generated {len(files)} embroidery file(s) from text '{request.text}'"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error converting text to embroidery: {e}")
         raise HTTPException(status_code=500, detail=f"Text to embroidery conversion failed: {str(e)}")
 
+def design_request(request: TextDesignModel) -> TextEmbroideryRequest:
+    """Build a geometry-only converter request"""
+    return TextEmbroideryRequest(
+        text=request.text,
+        shape=request.shape,
+        units=request.units,
+        line_length=request.line_length,
+        circle_radius=request.circle_radius,
+        output_formats=[]
+    )
+
+def estimate_design(request: TextDesignModel) -> dict:
+    """Run the geometry stage only and return design statistics"""
+    converter = converter_for_font(request.font)
+    estimate = converter.estimate(design_request(request))
+    return {"text": request.text, "font": converter.get_current_font(), **asdict(estimate)}
+
+@app.post("/text-to-embroidery/estimate", dependencies=[Depends(verify_api_key)])
+async def estimate_text_embroidery(request: TextDesignModel):
+    """Estimate stitch count, dimensions, run time and thread usage for a text design"""
+    try:
+        return {"success": True, "estimate": estimate_design(request)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error estimating design: {e}")
+        raise HTTPException(status_code=500, detail=f"Design estimate failed: {str(e)}")
+
+@app.post("/text-to-embroidery/estimate/batch", dependencies=[Depends(verify_api_key)])
+async def estimate_text_embroidery_batch(request: TextEstimateBatchModel):
+    """Estimate several text designs in one call for the pricing page"""
+    try:
+        return {"success": True, "estimates": [estimate_design(design) for design in request.designs]}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error estimating designs: {e}")
+        raise HTTPException(status_code=500, detail=f"Design estimate failed: {str(e)}")
+
+@app.post("/text-to-embroidery/preview", dependencies=[Depends(verify_api_key)])
+async def preview_text_embroidery(request: TextPreviewRequestModel):
+    """Render a preview image of the stitches for a text design"""
+    try:
+        preview_format = request.format.lower()
+        if preview_format not in ("png", "svg"):
+            raise HTTPException(status_code=400, detail=f"Unsupported preview format: {request.format}")
+        
+        converter = converter_for_font(request.font)
+        internal_request = design_request(request)
+        
+        # Previews share the request key of the generated files
+        low_res = request.progressive and preview_format == "png"
+        cache_key = (request_cache_key(internal_request, converter.get_current_font()),
+                     preview_format, "low" if low_res else "full")
+        content = preview_cache.get(cache_key)
+        cached = content is not None
+        
+        if not cached:
+            plan = converter.generate_stitch_plan(internal_request)
+            if preview_format == "svg":
+                content = render_svg(plan)
+            else:
+                content = render_png(plan, px_per_mm=LOW_RES_PX_PER_MM if low_res else PREVIEW_PX_PER_MM)
+            preview_cache.put(cache_key, content)
+        
+        return {
+            "success": True,
+            "text": request.text,
+            "format": preview_format,
+            "content": content.decode('utf-8') if preview_format == "svg" else base64.b64encode(content).decode('utf-8'),
+            "low_resolution": low_res,
+            "cached": cached
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error rendering preview: {e}")
+        raise HTTPException(status_code=500, detail=f"Preview rendering failed: {str(e)}")
+
+def get_live_session(session_id: str) -> LiveEditSession:
+    """Get or create a live editing session, evicting the least recently used"""
+    session = live_sessions.get(session_id)
+    if session is None:
+        session = LiveEditSession(max_cache_bytes=LIVE_EDIT_TEMPLATE_CACHE_BYTES)
+        live_sessions[session_id] = session
+        while len(live_sessions) > LIVE_EDIT_MAX_SESSIONS:
+            live_sessions.popitem(last=False)
+    live_sessions.move_to_end(session_id)
+    return session
+
+@app.post("/text-to-embroidery/live/{session_id}", dependencies=[Depends(verify_api_key)])
+async def live_edit_text_embroidery(session_id: str, request: LiveEditModel):
+    """Apply a text edit and return only the character stitches that changed"""
+    session = get_live_session(session_id)
+    superseded = {"success": True, "session_id": session_id, "revision": request.revision, "superseded": True}
+    
+    # Drop edits that a newer keystroke already replaced
+    if not session.submit(request.revision):
+        return superseded
+    await asyncio.sleep(LIVE_EDIT_COALESCE_SECONDS)
+    if session.is_superseded(request.revision):
+        return superseded
+    
+    try:
+        internal_request = TextEmbroideryRequest(
+            text=request.text,
+            shape=request.shape,
+            units=request.units,
+            line_length=request.line_length,
+            circle_radius=request.circle_radius,
+            output_formats=[]
+        )
+        delta = session.apply(internal_request, request.font or "default", request.revision)
+        
+        return {
+            "success": True,
+            "session_id": session_id,
+            "superseded": False,
+            **asdict(delta)
+        }
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error applying live edit for session {session_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Live edit failed: {str(e)}")
+
+@app.delete("/text-to-embroidery/live/{session_id}", dependencies=[Depends(verify_api_key)])
+async def close_live_edit_session(session_id: str):
+    """Discard a live editing session"""
+    live_sessions.pop(session_id, None)
+    return {"success": True, "session_id": session_id}
+
+@app.get("/profiles", dependencies=[Depends(verify_api_key)])
+async def list_profiles():
+    """List recently captured request profiles"""
+    try:
+        r = get_redis_connection()
+        profile_ids = [pid.decode('utf-8') for pid in r.lrange("profiles", 0, -1)]
+        raw_profiles = r.mget([f"profile:{pid}" for pid in profile_ids]) if profile_ids else []
+        
+        profiles = []
+        for raw in raw_profiles:
+            if raw is None:
+                continue  # Expired
+            profile = json.loads(raw)
+            profile.pop("stacks", None)
+            profiles.append(profile)
+        
+        return {"profiles": profiles}
+        
+    except Exception as e:
+        logger.error(f"Error listing profiles: {e}")
+        raise HTTPException(status_code=500, detail="Failed to list profiles")
+
+@app.get("/profiles/{profile_id}", dependencies=[Depends(verify_api_key)])
+async def get_profile(profile_id: str):
+    """Get a captured request profile with its sampled stacks"""
+    try:
+        r = get_redis_connection()
+        raw = r.get(f"profile:{profile_id}")
+    except Exception as e:
+        logger.error(f"Error getting profile: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get profile")
+    
+    if raw is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return json.loads(raw)
+
 @app.get("/text-embroidery-formats")
 async def get_supported_formats():
     """Get list of supported embroidery formats"""
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Embroidery Preview Renderer
+This module rasterizes stitch plans to PNG or emits a compact SVG so clients
+never have to parse DST/PES files to show a design.
+"""
+
+import zlib
+import struct
+from typing import Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from text_embroidery import StitchPlan
+
+THREAD_WIDTH_MM = 0.4  # Typical 40wt embroidery thread
+PREVIEW_PX_PER_MM = 8.0
+LOW_RES_PX_PER_MM = 2.0
+MAX_PREVIEW_PX = 2048
+MARGIN_MM = 2.0
+THREAD_COLOR = (30, 30, 30)
+PNG_COMPRESS_LEVEL = 1  # Encoding dominates render time; 1-bit line art compresses well anyway
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+def _design_bounds(points: np.ndarray, plan: StitchPlan) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the (min, max) corners covering both the design box and every stitch."""
+    low = np.zeros(2)
+    high = np.array([plan.width, plan.height], dtype=float)
+    if len(points):
+        low = np.minimum(low, points.min(axis=0))
+        high = np.maximum(high, points.max(axis=0))
+    return low - MARGIN_MM, high + MARGIN_MM
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+def _encode_png_1bit(bitmap: np.ndarray) -> bytes:
+    """Encode a boolean bitmap (True = white) as a 1-bit grayscale PNG.
+
+    Pillow packs 1-bit images to bytes pixel by pixel, which costs more than
+    drawing the preview; NumPy packs the rows in one call.
+    """
+    height, width = bitmap.shape
+    rows = np.packbits(bitmap, axis=1)
+    # Each scanline starts with filter type 0 (none)
+    scanlines = np.hstack((np.zeros((height, 1), dtype=np.uint8), rows))
+    header = struct.pack(">IIBBBBB", width, height, 1, 0, 0, 0, 0)
+    return (PNG_SIGNATURE
+            + _png_chunk(b'IHDR', header)
+            + _png_chunk(b'IDAT', zlib.compress(scanlines.tobytes(), PNG_COMPRESS_LEVEL))
+            + _png_chunk(b'IEND', b''))
+
+def render_png(plan: StitchPlan, px_per_mm: float = PREVIEW_PX_PER_MM,
+               thread_width_mm: float = THREAD_WIDTH_MM) -> bytes:
+    """Rasterize a stitch plan to a 1-bit PNG with thread-width strokes."""
+    points = np.asarray(plan.stitches, dtype=float).reshape(-1, 2)
+    low, high = _design_bounds(points, plan)
+
+    # Keep huge designs within a sane image size
+    extent = high - low
+    px_per_mm = min(px_per_mm, MAX_PREVIEW_PX / float(extent.max()))
+    size = np.maximum(np.ceil(extent * px_per_mm), 1).astype(int)
+
+    # Single-colour line art needs no colour channels, which keeps encoding cheap
+    image = Image.new("1", (int(size[0]), int(size[1])), 1)
+    if len(points) >= 2:
+        # Transform all coordinates at once and hand Pillow a flat coordinate list
+        pixels = (points - low) * px_per_mm
+        stroke = max(1, int(round(thread_width_mm * px_per_mm)))
+        ImageDraw.Draw(image).line(pixels.ravel().tolist(), fill=0, width=stroke, joint="curve")
+
+    return _encode_png_1bit(np.asarray(image))
+
+def render_svg(plan: StitchPlan, thread_width_mm: float = THREAD_WIDTH_MM) -> bytes:
+    """Emit a compact SVG polyline in millimetre units."""
+    points = np.asarray(plan.stitches, dtype=float).reshape(-1, 2)
+    low, high = _design_bounds(points, plan)
+    extent = high - low
+
+    # 0.1mm precision matches the resolution of the machine formats
+    coords = " ".join(f"{x:g},{y:g}" for x, y in np.round(points - low, 1).tolist())
+    color = "#%02x%02x%02x" % THREAD_COLOR
+    svg = (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {extent[0]:g} {extent[1]:g}" '
+        f'width="{extent[0]:g}mm" height="{extent[1]:g}mm">'
+        f'<polyline points="{coords}" fill="none" stroke="{color}" '
+        f'stroke-width="{thread_width_mm:g}" stroke-linejoin="round" stroke-linecap="round"/>'
+        f'</svg>'
+    )
+    return svg.encode('utf-8')
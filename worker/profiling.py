@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Sampling Profiler
+This module provides a lightweight statistical profiler used to capture
+profiles of individual worker requests on demand.
+"""
+
+import sys
+import time
+import threading
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+DEFAULT_INTERVAL = 0.001  # seconds between samples
+MAX_STACK_DEPTH = 64
+MAX_REPORTED_STACKS = 200
+
+class SamplingProfiler:
+    """Periodically samples the call stack of the thread that started it.
+
+    When a scope frame is given (the root coroutine frame of an asyncio task),
+    only samples taken while that frame is on the stack are kept, so other
+    tasks sharing the event loop thread are not attributed to the profile.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, scope_frame=None):
+        self.interval = interval
+        self.scope_frame = scope_frame
+        self.samples: Counter = Counter()
+        self.excluded_samples = 0
+        self._target_thread: Optional[int] = None
+        self._sampler: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._started_at = 0.0
+        self._duration = 0.0
+
+    def start(self) -> None:
+        """Start sampling the calling thread in the background."""
+        self._target_thread = threading.get_ident()
+        self._started_at = time.perf_counter()
+        self._sampler = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the sampler thread to exit."""
+        self._stopped.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        self._duration = time.perf_counter() - self._started_at
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._target_thread)
+            if frame is None:
+                continue
+            if self.scope_frame is not None and not self._within_scope(frame):
+                self.excluded_samples += 1
+                continue
+            self.samples[self._stack_of(frame)] += 1
+
+    def _within_scope(self, frame) -> bool:
+        """Check whether the scope frame is anywhere on the sampled stack."""
+        while frame is not None:
+            if frame is self.scope_frame:
+                return True
+            frame = frame.f_back
+        return False
+
+    @staticmethod
+    def _stack_of(frame) -> Tuple[str, ...]:
+        """Collapse a frame chain into a root-first tuple of function labels."""
+        stack = []
+        while frame is not None and len(stack) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+            frame = frame.f_back
+        return tuple(reversed(stack))
+
+    def report(self) -> Dict:
+        """Return the profile as collapsed stacks, heaviest first."""
+        total = sum(self.samples.values())
+        if self.scope_frame is not None:
+            scope = "task: only samples taken while this request's asyncio task was running; time spent awaiting and other requests are excluded"
+        else:
+            scope = "thread: every sample of the profiled thread"
+        return {
+            "scope": scope,
+            "interval_ms": self.interval * 1000,
+            "duration_ms": round(self._duration * 1000, 3),
+            "sample_count": total,
+            "excluded_sample_count": self.excluded_samples,
+            "stacks": [
+                {"stack": ";".join(stack), "count": count}
+                for stack, count in self.samples.most_common(MAX_REPORTED_STACKS)
+            ]
+        }
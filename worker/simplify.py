@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Stitch Plan Simplification
+This module removes redundant stitches from a stitch plan: consecutive
+duplicates, interior points of straight running-stitch runs, and stitches
+shorter than the machine minimum.
+"""
+
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+
+MIN_STITCH_LENGTH = 0.3  # mm, shortest stitch worth sewing
+COLLINEAR_TOLERANCE = 0.05  # mm a dropped point may deviate from the straightened run
+
+@dataclass
+class SimplifyStats:
+    input_count: int
+    output_count: int
+    duplicates_removed: int = 0
+    collinear_removed: int = 0
+    short_merged: int = 0
+
+    @property
+    def removed(self) -> int:
+        return self.input_count - self.output_count
+
+def _alternate_in_runs(mask: np.ndarray) -> np.ndarray:
+    """Thin each run of candidate points to every other one so neighbours are never dropped together."""
+    if not mask.any():
+        return mask
+    run_start = mask & ~np.concatenate(([False], mask[:-1]))
+    run_id = np.cumsum(run_start)
+    index = np.arange(len(mask))
+    start_index = np.zeros(run_id.max() + 1, dtype=int)
+    start_index[run_id[run_start]] = index[run_start]
+    return mask & ((index - start_index[run_id]) % 2 == 0)
+
+def _remove_duplicates(points: np.ndarray) -> np.ndarray:
+    keep = np.ones(len(points), dtype=bool)
+    keep[1:] = np.any(points[1:] != points[:-1], axis=1)
+    return points[keep]
+
+def _collinear_pass(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """Drop interior points lying on the straight line between their neighbours."""
+    previous, current, following = points[:-2], points[1:-1], points[2:]
+    chord = following - previous
+    chord_length = np.hypot(chord[:, 0], chord[:, 1])
+    offset = current - previous
+
+    # Perpendicular distance to the chord, and no change of direction at the point
+    cross = np.abs(chord[:, 0] * offset[:, 1] - chord[:, 1] * offset[:, 0])
+    straight = (cross <= tolerance * chord_length) & (np.einsum('ij,ij->i', offset, following - current) > 0)
+
+    drop = np.zeros(len(points), dtype=bool)
+    drop[1:-1] = _alternate_in_runs(straight)
+    return points[~drop]
+
+def _short_stitch_pass(points: np.ndarray, min_length: float) -> np.ndarray:
+    """Merge stitches shorter than the minimum into the following stitch."""
+    delta = np.diff(points, axis=0)
+    short = np.hypot(delta[:, 0], delta[:, 1]) < min_length
+
+    # Drop the end point of a short stitch, or its start point for the final stitch
+    drop = np.zeros(len(points), dtype=bool)
+    drop[1:] = short
+    if drop[-1]:
+        drop[-1] = False
+        drop[-2] = len(points) > 2
+    drop[1:-1] = _alternate_in_runs(drop[1:-1])
+    return points[~drop]
+
+def simplify_stitches(points, min_length: float = MIN_STITCH_LENGTH, tolerance: float = COLLINEAR_TOLERANCE,
+                      collapse_collinear: bool = True, merge_short: bool = True) -> Tuple[np.ndarray, SimplifyStats]:
+    """Simplify a stitch sequence and report how many points each stage removed.
+
+    Collinear collapsing and short-stitch merging only suit running stitches;
+    disable both for satin columns, whose passes must stay evenly spaced and
+    may be narrower than the minimum stitch length.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    stats = SimplifyStats(input_count=len(points), output_count=len(points))
+    if len(points) < 3:
+        return points, stats
+
+    simplified = _remove_duplicates(points)
+    stats.duplicates_removed = len(points) - len(simplified)
+
+    if collapse_collinear:
+        count = len(simplified)
+        while len(simplified) >= 3:
+            reduced = _collinear_pass(simplified, tolerance)
+            if len(reduced) == len(simplified):
+                break
+            simplified = reduced
+        stats.collinear_removed = count - len(simplified)
+
+    if merge_short:
+        count = len(simplified)
+        while len(simplified) >= 2:
+            reduced = _short_stitch_pass(simplified, min_length)
+            if len(reduced) == len(simplified):
+                break
+            simplified = reduced
+        stats.short_merged = count - len(simplified)
+
+    stats.output_count = len(simplified)
+    return simplified, stats
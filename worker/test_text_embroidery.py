@@ -106,6 +106,392 @@ def test_individual_formats():
     except Exception as e:
         print(f"❌ Error: {e}")
 
+def test_preview_rendering():
+    """Test PNG and SVG preview rendering from the stitch plan"""
+    print("\n🖼️  Testing Preview Rendering")
+    print("=" * 50)
+    
+    from preview import render_png, render_svg, LOW_RES_PX_PER_MM
+    
+    converter = TextEmbroideryConverter()
+    converter.set_font("block")
+    request = TextEmbroideryRequest(
+        text="HELLO",
+        shape="line",
+        units="mm",
+        line_length=100,
+        output_formats=[]
+    )
+    plan = converter.generate_stitch_plan(request)
+    
+    png = render_png(plan)
+    low_res_png = render_png(plan, px_per_mm=LOW_RES_PX_PER_MM)
+    svg = render_svg(plan)
+    
+    import io
+    from PIL import Image
+    assert png.startswith(b'\x89PNG')
+    decoded = Image.open(io.BytesIO(png))
+    assert decoded.mode == "1" and decoded.getextrema() == (0, 255)
+    assert len(low_res_png) < len(png)
+    assert svg.startswith(b'<svg') and b'<polyline' in svg
+    
+    # An uncached preview must cost less than generating the machine files
+    import time
+    request.output_formats = ["DST", "PES"]
+    def best_of(run, repeat=20):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+    preview_time = best_of(lambda: render_png(converter.generate_stitch_plan(request)))
+    files_time = best_of(lambda: converter.convert_text_to_embroidery(request))
+    assert preview_time < files_time
+    print(f"   ✅ PNG {len(png)} bytes, low-res PNG {len(low_res_png)} bytes, SVG {len(svg)} bytes")
+    print(f"   ✅ Preview {preview_time * 1000:.2f} ms vs files {files_time * 1000:.2f} ms")
+
+def test_design_estimate():
+    """Test geometry-only design estimates"""
+    print("\n📏 Testing Design Estimate")
+    print("=" * 50)
+    
+    converter = TextEmbroideryConverter()
+    converter.set_font("block")
+    request = TextEmbroideryRequest(
+        text="HI",
+        shape="line",
+        units="mm",
+        line_length=40,
+        output_formats=[]
+    )
+    estimate = converter.estimate(request)
+    
+    # Two 20mm block rectangles joined by a 20mm travel stitch that continues
+    # straight along the second rectangle's top edge, so one point is simplified away
+    assert estimate.stitch_count == 9
+    assert estimate.stitches_removed == 1
+    assert estimate.width == 40.0 and estimate.height == 20.0
+    assert estimate.thread_length == 180.0
+    assert estimate.run_time_seconds > 0
+    
+    # The estimate stays in NumPy but must agree with the stitch plan
+    converter.set_font("satin")
+    satin_estimate = converter.estimate(request)
+    plan = converter.generate_stitch_plan(request)
+    assert satin_estimate.stitch_count == len(plan.stitches)
+    assert satin_estimate.stitches_removed == plan.simplification.removed
+    print(f"   ✅ {estimate}")
+
+def test_sampling_profiler():
+    """Test capturing a profile of a conversion"""
+    print("\n⏱️  Testing Sampling Profiler")
+    print("=" * 50)
+    
+    from profiling import SamplingProfiler
+    
+    converter = TextEmbroideryConverter()
+    request = TextEmbroideryRequest(
+        text="PROFILE",
+        shape="circle",
+        units="mm",
+        circle_radius=50,
+        output_formats=["DST", "PES", "JEF"]
+    )
+    
+    profiler = SamplingProfiler()
+    profiler.start()
+    for _ in range(50):
+        converter.convert_text_to_embroidery(request)
+    profiler.stop()
+    report = profiler.report()
+    
+    assert report["sample_count"] == sum(entry["count"] for entry in report["stacks"])
+    assert report["duration_ms"] > 0
+    print(f"   ✅ {report['sample_count']} samples over {report['duration_ms']} ms")
+
+def test_satin_columns():
+    """Test satin column generation"""
+    print("\n🪡 Testing Satin Columns")
+    print("=" * 50)
+    
+    import numpy as np
+    from satin import satin_columns, satin_from_rails
+    
+    # A straight 10mm stroke at 0.5mm spacing gives 21 passes across a 2mm column
+    satin = satin_columns([[(0, 0), (10, 0)]], width=2.0, spacing=0.5, underlay="none")
+    assert satin.shape == (42, 2)
+    assert set(abs(satin[:, 1]).round(6)) == {1.0}
+    
+    with_underlay = satin_columns([[(0, 0), (10, 0)]], width=2.0, spacing=0.5, underlay="center")
+    assert len(with_underlay) > len(satin)
+    assert tuple(with_underlay[-1]) == tuple(satin[-1])
+    
+    rails = satin_from_rails([(0, 1), (10, 1)], [(0, -1), (10, -1)], spacing=0.5)
+    assert rails.shape == (42, 2)
+    
+    converter = TextEmbroideryConverter()
+    converter.set_font("satin")
+    request = TextEmbroideryRequest(
+        text="SATIN",
+        shape="line",
+        units="mm",
+        line_length=100,
+        output_formats=["DST"]
+    )
+    files = converter.convert_text_to_embroidery(request)
+    assert len(files) == 1
+    
+    # Batching a line's strokes must give the same columns as sewing each character alone
+    typed = TextEmbroideryRequest(text="THE QUICK BROWN FOX JUMPS OVER THE LAZY DOG", shape="line", units="mm",
+                                  line_length=100, output_formats=[])
+    placements = converter.layout_characters(typed.text, "line", 100, 20)
+    per_character = [point for placement in placements for point in converter.character_stitches("line", placement)]
+    batched = converter.generate_stitch_plan(typed, simplify=False).stitches
+    assert len(batched) == len(per_character) and np.allclose(batched, per_character)
+    print(f"   ✅ {len(converter.generate_stitch_plan(request).stitches)} satin stitches for '{request.text}'")
+
+def test_live_edit_session():
+    """Test incremental regeneration while editing text"""
+    print("\n⌨️  Testing Live Edit Session")
+    print("=" * 50)
+    
+    import numpy as np
+    from live_edit import LiveEditSession
+    
+    session = LiveEditSession()
+    
+    def edit(text, revision, shape="line", font="block"):
+        assert session.submit(revision)
+        request = TextEmbroideryRequest(text=text, shape=shape, units="mm", line_length=100, output_formats=[])
+        return session.apply(request, font, revision)
+    
+    def matches_full_conversion(text, shape="line", font="block"):
+        converter = TextEmbroideryConverter()
+        converter.set_font(font)
+        request = TextEmbroideryRequest(text=text, shape=shape, units="mm", line_length=100, output_formats=[])
+        raw = converter.generate_stitch_plan(request, simplify=False)
+        full = converter.generate_stitch_plan(request)
+        return (np.allclose(session.raw_stitches(), raw.stitches)
+                and len(session.stitches()) == len(full.stitches)
+                and np.allclose(session.stitches(), full.stitches))
+    
+    first = edit("HELL", 1)
+    assert first.recomputed == 3  # H, E and one shared L
+    
+    # With a fixed line length every cell shrinks, but existing glyphs are only moved
+    appended = edit("HELLO", 2)
+    assert list(appended.changed) == [4] and sorted(appended.moved) == [0, 1, 2, 3]
+    assert appended.recomputed == 1
+    assert matches_full_conversion("HELLO")
+    
+    # Stale revisions are dropped
+    assert not session.submit(2)
+    
+    # An unknown font is rejected rather than reusing the session's font
+    try:
+        edit("HELLO", 3, font="Block")
+        assert False, "unknown font accepted"
+    except ValueError:
+        pass
+    assert session.applied_revision == 2
+    
+    # On a circle the existing characters are rotated into their new positions
+    edit("HELL", 4, shape="circle")
+    circled = edit("HELLO", 5, shape="circle")
+    assert list(circled.changed) == [4] and circled.recomputed == 1
+    assert matches_full_conversion("HELLO", shape="circle")
+    
+    for font in ["default", "script", "serif", "satin"]:
+        edit("HELL", session.latest_revision + 1, font=font)
+        edit("HELLO", session.latest_revision + 1, font=font)
+        assert matches_full_conversion("HELLO", font=font)
+    
+    # Satin glyphs change size on every keystroke at a fixed line length; the cache stays bounded
+    typed = "THE QUICK BROWN FOX JUMPS OVER THE LAZY DOG"
+    for length in range(1, len(typed) + 1):
+        edit(typed[:length], session.latest_revision + 1, font="satin")
+    assert session._cache_bytes == sum(stitches.nbytes for stitches in session._cache.values())
+    assert session._cache_bytes <= session.max_cache_bytes
+    assert matches_full_conversion(typed, font="satin")
+    print(f"   ✅ {appended.recomputed} of {appended.character_count} characters regenerated")
+
+def test_batch_resume():
+    """Test batch conversion with checkpoint resume"""
+    print("\n📦 Testing Batch Conversion")
+    print("=" * 50)
+    
+    import json
+    import tempfile
+    import batch
+    from batch import run_batch
+    
+    with tempfile.TemporaryDirectory() as work_dir:
+        manifest = os.path.join(work_dir, "manifest.jsonl")
+        output_dir = os.path.join(work_dir, "out")
+        with open(manifest, 'w') as f:
+            for text in ["ONE", "TWO"]:
+                f.write(json.dumps({"id": text.lower(), "text": text, "font": "block", "output_formats": ["DST"]}) + "\n")
+        
+        assert run_batch(manifest, output_dir, workers=2) == (2, 0, 0)
+        output_file = os.path.join(output_dir, "one", "embroidery_ONE.dst")
+        assert os.path.exists(output_file)
+        assert os.stat(output_file).st_mode & 0o777 == 0o666 & ~batch._UMASK
+        
+        # A second run resumes from the checkpoint and skips finished jobs
+        with open(manifest, 'a') as f:
+            f.write(json.dumps({"id": "three", "text": "THREE", "output_formats": ["PES"]}) + "\n")
+        assert run_batch(manifest, output_dir, workers=2) == (1, 2, 0)
+        
+        # Malformed lines are reported as failures without stopping the run
+        with open(manifest, 'a') as f:
+            f.write('{"id": "broken", "text": \n')
+            f.write(json.dumps({"id": "notext"}) + "\n")
+            f.write(json.dumps({"id": "six", "text": "SIX"}) + "\n")
+        assert run_batch(manifest, output_dir, workers=2) == (1, 3, 2)
+        
+        # A job missing one of its formats fails without writing partial output
+        batch._init_worker(output_dir)
+        encode = batch._converter._generate_embroidery_content
+        def failing_pes(request, format_name, plan):
+            if format_name == "PES":
+                raise ValueError("encoder failed")
+            return encode(request, format_name, plan)
+        batch._converter._generate_embroidery_content = failing_pes
+        job_id, file_count, error = batch.convert_job({"id": "four", "text": "FOUR", "output_formats": ["DST", "PES"]})
+        assert file_count == 0 and error == "failed to generate PES"
+        
+        # A font the converter doesn't know never inherits the previous job's font
+        batch._converter.set_font("satin")
+        assert batch.convert_job({"id": "five", "text": "FIVE", "font": "Block"}) == ("five", 0, "unknown font: Block")
+        assert not os.path.exists(os.path.join(output_dir, "four"))
+    print("   ✅ Batch conversion resumed from checkpoint")
+
+def test_stitch_simplification():
+    """Test removal of redundant stitches"""
+    print("\n✂️  Testing Stitch Simplification")
+    print("=" * 50)
+    
+    from simplify import simplify_stitches
+    
+    stitches = [(0, 0), (0, 0), (1, 0), (2, 0), (3, 0), (3, 5), (3.1, 5.1), (0, 5)]
+    simplified, stats = simplify_stitches(stitches, min_length=0.3)
+    
+    assert simplified.tolist() == [[0, 0], [3, 0], [3, 5], [0, 5]]
+    assert stats.duplicates_removed == 1
+    assert stats.collinear_removed == 2
+    assert stats.short_merged == 1
+    assert stats.removed == 4
+    
+    # Satin zig-zags are left alone
+    zig_zag = [(0, 1), (0.4, -1), (0.8, 1), (1.2, -1)]
+    assert simplify_stitches(zig_zag, collapse_collinear=False, merge_short=False)[1].removed == 0
+    
+    # Narrow satin columns keep every pass even though each stitch is below the minimum length
+    converter = TextEmbroideryConverter()
+    converter.set_font("satin")
+    converter.satin_width = 0.25
+    request = TextEmbroideryRequest(text="SATIN", shape="line", units="mm", output_formats=[])
+    plan = converter.generate_stitch_plan(request)
+    assert plan.simplification.short_merged == 0
+    assert plan.simplification.removed == plan.simplification.duplicates_removed
+    
+    converter = TextEmbroideryConverter()
+    converter.set_font("serif")
+    request = TextEmbroideryRequest(text="TILT", shape="line", units="mm", output_formats=[])
+    plan = converter.generate_stitch_plan(request)
+    assert plan.simplification.removed > 0
+    print(f"   ✅ Removed {plan.simplification.removed} of {plan.simplification.input_count} serif stitches")
+
+def test_job_cancellation():
+    """Test that jobs canceled in the database stop without completing"""
+    print("\n🛑 Testing Job Cancellation")
+    print("=" * 50)
+    
+    import asyncio
+    import main
+    
+    class StubCursor:
+        def __init__(self, queries):
+            self.queries = queries
+            self.rowcount = 0
+        def execute(self, query, params=None):
+            # Only the cancel bookkeeping matches a row; the job itself is already canceled
+            self.queries.append(" ".join(query.split()))
+            self.rowcount = 1 if "'canceled'," in query else 0
+        def fetchone(self):
+            return ("job",) if self.rowcount else None
+        def close(self):
+            pass
+    
+    class StubConnection:
+        def __init__(self, queries):
+            self.queries = queries
+        def cursor(self):
+            return StubCursor(self.queries)
+        def commit(self):
+            pass
+        def close(self):
+            pass
+    
+    queries = []
+    get_db_connection = main.get_db_connection
+    main.get_db_connection = lambda: StubConnection(queries)
+    try:
+        job = main.JobRequest(job_id="job-1", input_file_path="in.png", output_formats=["DST"])
+        result = asyncio.run(main.run_job(job, None))
+    finally:
+        main.get_db_connection = get_db_connection
+    
+    # Without a Redis signal the zero-row processing update still stops the job
+    assert result["status"] == "canceled" and not result["success"]
+    assert len(queries) == 2 and "SET status = 'canceled'" in queries[1]
+    
+    # Naive deadlines are read as UTC
+    from datetime import datetime, timedelta, timezone
+    now = datetime.now(timezone.utc)
+    def job_due(deadline):
+        return main.JobRequest(job_id="job-2", input_file_path="in.png", output_formats=["DST"], deadline=deadline)
+    assert main.deadline_passed(job_due(now - timedelta(seconds=1)))
+    assert main.deadline_passed(job_due((now - timedelta(seconds=1)).replace(tzinfo=None)))
+    assert not main.deadline_passed(job_due((now + timedelta(hours=1)).replace(tzinfo=None)))
+    assert not main.deadline_passed(job_due(None))
+    
+    class StubRedis:
+        def __init__(self, cancelled=False, fail=False):
+            self.cancelled, self.fail = cancelled, fail
+        def exists(self, key):
+            if self.fail:
+                raise ConnectionError("redis down")
+            return int(self.cancelled and key == "job_cancel:job-2")
+        set = lrem = exists
+    
+    def stops(job, r):
+        try:
+            asyncio.run(main.check_job_active(job, r))
+        except main.JobCancelled:
+            return True
+        return False
+    active = job_due(now + timedelta(hours=1))
+    assert stops(active, StubRedis(cancelled=True))
+    assert stops(job_due(now - timedelta(seconds=1)), None)
+    assert not stops(active, StubRedis())
+    assert not stops(active, StubRedis(fail=True))
+    assert not stops(active, None)
+    
+    # Once the database row is canceled, a failing Redis signal is only a warning
+    main.get_db_connection = lambda: StubConnection(queries)
+    get_redis_connection = main.get_redis_connection
+    main.get_redis_connection = lambda: StubRedis(fail=True)
+    try:
+        response = asyncio.run(main.cancel_job("job-3"))
+    finally:
+        main.get_db_connection = get_db_connection
+        main.get_redis_connection = get_redis_connection
+    assert response["success"] and response["status"] == "canceled" and "warning" in response
+    print(f"   ✅ {result['message']}")
+
 if __name__ == "__main__":
     print("🚀 Starting Text to Embroidery Tests")
     print("=" * 50)
@@ -113,6 +499,14 @@ if __name__ == "__main__":
     try:
         test_text_conversion()
         test_individual_formats()
+        test_preview_rendering()
+        test_design_estimate()
+        test_sampling_profiler()
+        test_satin_columns()
+        test_live_edit_session()
+        test_batch_resume()
+        test_stitch_simplification()
+        test_job_cancellation()
         print("\n🎉 All tests completed successfully!")
         
     except Exception as e:
@@ -4,14 +4,23 @@ Text to Embroidery Converter
 This module provides functionality to convert text into embroidery machine files.
 """
 
-import os
 import io
 import math
 import json
-from typing import Dict, List, Tuple, Optional
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple, Optional
 from dataclasses import dataclass
 from enum import Enum
+import numpy as np
 from pyembroidery import EmbPattern, STITCH, write_dst, write_pes, write_jef
+from glyphs import glyph_strokes
+from satin import satin_columns, DEFAULT_WIDTH, DEFAULT_SPACING
+from simplify import simplify_stitches, SimplifyStats, MIN_STITCH_LENGTH, COLLINEAR_TOLERANCE
+
+MACHINE_SPEED_SPM = 800  # Typical single-head machine speed, stitches per minute
+GLYPH_SCALE = 0.8  # Fraction of the character cell covered by a satin glyph
+SCALABLE_FONTS = ("block", "script", "serif")  # Glyphs are affine in the character cell
 
 class EmbroideryFormat(Enum):
     DST = "dst"
@@ -36,20 +45,81 @@ class EmbroideryFile:
     content: bytes
     filename: str
 
+@dataclass
+class StitchPlan:
+    stitches: List[Tuple[float, float]]
+    width: float
+    height: float
+    simplification: Optional[SimplifyStats] = None
+
+@dataclass
+class DesignEstimate:
+    stitch_count: int
+    width: float  # mm, stitch bounding box
+    height: float  # mm, stitch bounding box
+    run_time_seconds: float
+    thread_length: float  # mm of sewn path
+    stitches_removed: int = 0  # Redundant stitches dropped by simplification
+
+def request_cache_key(request: TextEmbroideryRequest, font: str) -> str:
+    """Build a stable cache key for everything that affects the generated stitches."""
+    payload = json.dumps({
+        "text": request.text,
+        "shape": request.shape,
+        "units": request.units,
+        "line_length": request.line_length,
+        "circle_radius": request.circle_radius,
+        "font": font,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class ResultCache:
+    """Small in-process LRU cache for generated files and previews."""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Any]" = OrderedDict()
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        """Return a cached result and mark it as recently used."""
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Tuple, value: Any) -> None:
+        """Store a result, evicting the least recently used entries."""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
 class TextEmbroideryConverter:
     def __init__(self):
         self.stitch_density = 0.4  # stitches per mm
         self.character_width = 6.0  # mm per character (approximate)
-        self.available_fonts = ["default", "block", "script", "serif"]
+        self.available_fonts = ["default", "block", "script", "serif", "satin"]
         self.current_font = "default"
+        self.satin_width = DEFAULT_WIDTH  # mm column width
+        self.satin_spacing = DEFAULT_SPACING  # mm between satin passes
+        self.satin_underlay = "center"  # 'none', 'center' or 'edge'
+        self.min_stitch_length = MIN_STITCH_LENGTH  # mm, shorter stitches are merged
+        self.simplify_tolerance = COLLINEAR_TOLERANCE  # mm, allowed deviation when straightening runs
         
     def convert_text_to_embroidery(self, request: TextEmbroideryRequest) -> List[EmbroideryFile]:
         """Convert text to embroidery files in the specified formats."""
         files = []
         
+        # The stitch plan is shared by every output format
+        try:
+            plan = self.generate_stitch_plan(request)
+        except Exception as e:
+            print(f"Error generating stitches: {e}")
+            return files
+        
         for format_name in request.output_formats:
             try:
-                content = self._generate_embroidery_content(request, format_name)
+                content = self._generate_embroidery_content(request, format_name, plan)
                 filename = f"embroidery_{request.text[:20]}.{format_name.lower()}"
                 
                 files.append(EmbroideryFile(
@@ -63,19 +133,72 @@ class TextEmbroideryConverter:
                 
         return files
     
-    def _generate_embroidery_content(self, request: TextEmbroideryRequest, format_name: str) -> bytes:
-        """Generate embroidery file content for a specific format."""
-        
-        # Calculate dimensions
+    def design_size(self, request: TextEmbroideryRequest) -> Tuple[float, float]:
+        """Calculate the design width and height in mm."""
         if request.shape == 'line':
             width = request.line_length or (len(request.text) * self.character_width)
             height = 20  # Fixed height for line text
         else:  # circle
             radius = request.circle_radius or 50
             width = height = radius * 2
+        return width, height
+    
+    def generate_stitch_plan(self, request: TextEmbroideryRequest, simplify: bool = True) -> StitchPlan:
+        """Run only the geometry stage and return the stitch coordinates with design size."""
+        width, height = self.design_size(request)
         
         # Generate stitch coordinates
-        stitches = self._generate_stitches(request.text, request.shape, width, height)
+        points = self._generate_stitches(request.text, request.shape, width, height)
+        if not simplify:
+            return StitchPlan(stitches=[tuple(point) for point in points.tolist()], width=width, height=height)
+        
+        points, stats = self._simplify_points(points)
+        return StitchPlan(stitches=[tuple(point) for point in points.tolist()], width=width, height=height,
+                          simplification=stats)
+    
+    def simplify_plan_stitches(self, stitches: List[Tuple[float, float]]) -> Tuple[List[Tuple[float, float]], SimplifyStats]:
+        """Simplify a raw stitch list with this converter's font and thresholds."""
+        simplified, stats = self._simplify_points(stitches)
+        return [tuple(point) for point in simplified.tolist()], stats
+    
+    def _simplify_points(self, points) -> Tuple[np.ndarray, SimplifyStats]:
+        # Satin passes must stay evenly spaced and narrow columns have short
+        # stitches by design, so only running stitches are straightened and merged
+        running = self.current_font != "satin"
+        simplified, stats = simplify_stitches(
+            points,
+            min_length=self.min_stitch_length,
+            tolerance=self.simplify_tolerance,
+            collapse_collinear=running,
+            merge_short=running
+        )
+        return simplified, stats
+    
+    def estimate(self, request: TextEmbroideryRequest) -> DesignEstimate:
+        """Estimate stitch count, size, run time and thread usage without encoding any files."""
+        # Stay in NumPy throughout; converting satin columns to tuples and back costs more than sewing them
+        width, height = self.design_size(request)
+        points, stats = self._simplify_points(self._generate_stitches(request.text, request.shape, width, height))
+        
+        if len(points) == 0:
+            return DesignEstimate(stitch_count=0, width=0.0, height=0.0, run_time_seconds=0.0, thread_length=0.0)
+        
+        size = points.max(axis=0) - points.min(axis=0)
+        segments = np.diff(points, axis=0)
+        thread_length = float(np.hypot(segments[:, 0], segments[:, 1]).sum())
+        
+        return DesignEstimate(
+            stitch_count=len(points),
+            width=float(size[0]),
+            height=float(size[1]),
+            run_time_seconds=len(points) * 60.0 / MACHINE_SPEED_SPM,
+            thread_length=thread_length,
+            stitches_removed=stats.removed
+        )
+    
+    def _generate_embroidery_content(self, request: TextEmbroideryRequest, format_name: str, plan: StitchPlan) -> bytes:
+        """Generate embroidery file content for a specific format."""
+        stitches = plan.stitches
 
         # Build embroidery pattern
         pattern = EmbPattern()
@@ -108,29 +231,83 @@ class TextEmbroideryConverter:
             return self._to_generic_format(stitches, format_name, request)
         return buffer.getvalue()
     
-    def _generate_stitches(self, text: str, shape: str, width: float, height: float) -> List[Tuple[float, float]]:
-        """Generate stitch coordinates for the text."""
-        stitches = []
+    def _generate_stitches(self, text: str, shape: str, width: float, height: float) -> np.ndarray:
+        """Generate stitch coordinates for the text as an (N, 2) array."""
+        if shape == 'line' and self.current_font == "satin":
+            # Batch every glyph stroke of the line into a single satin pass
+            strokes = []
+            for placement in self.layout_characters(text, 'line', width, height):
+                strokes.extend(self._glyph_strokes(*placement))
+            return self._satin_columns(strokes)
         
         if shape == 'line':
             stitches = self._generate_line_stitches(text, width, height)
         else:  # circle
             stitches = self._generate_circle_stitches(text, width, height)
             
-        return stitches
+        return np.asarray(stitches, dtype=float).reshape(-1, 2)
+    
+    def layout_characters(self, text: str, shape: str, width: float, height: float) -> List[Tuple]:
+        """Place each character; its stitches depend only on this placement and the font."""
+        if not text:
+            return []
+        
+        if shape == 'line':
+            char_width = width / len(text)
+            return [(char, i * char_width + char_width / 2, height / 2, char_width, height)
+                    for i, char in enumerate(text)]
+        
+        # Circle: characters are spread evenly around the arc
+        angle_per_char = (2 * math.pi) / len(text)
+        return [(char, i * angle_per_char, width, height) for i, char in enumerate(text)]
+    
+    def character_stitches(self, shape: str, placement: Tuple) -> List[Tuple[float, float]]:
+        """Generate the stitches for one placed character."""
+        if shape == 'line':
+            return self._generate_character_stitches(*placement)
+        return self._circle_character_stitches(*placement)
+    
+    def character_template(self, shape: str, placement: Tuple) -> Tuple[Tuple, np.ndarray]:
+        """Split a placement into a reusable template placement and a 2x3 affine transform.
+        
+        The placed character's stitches equal the template's stitches mapped
+        through the transform. Placements that cannot be factored this way are
+        their own template with the identity transform.
+        """
+        identity = np.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]])
+        
+        if shape == 'line':
+            char, x, y, width, height = placement
+            if self.current_font in SCALABLE_FONTS:
+                # Glyph drawn in a unit cell, then scaled and moved into place
+                return (char, 0.0, 0.0, 1.0, 1.0), np.array([[width, 0.0, x], [0.0, height, y]])
+            if self.current_font == "satin":
+                # Satin density is in mm, so only translation is exact
+                return (char, 0.0, 0.0, width, height), np.array([[1.0, 0.0, x], [0.0, 1.0, y]])
+            # The default font clips stitches to absolute coordinates
+            return placement, identity
+        
+        char, angle, width, height = placement
+        if width / 2 < 5:
+            # The inner radius goes negative and stitches may be clipped
+            return placement, identity
+        
+        # Rotate the character from angle zero about the circle centre
+        center_x, center_y = width / 2, height / 2
+        cos_a, sin_a = math.cos(angle), math.sin(angle)
+        return (char, 0.0, width, height), np.array([
+            [cos_a, -sin_a, center_x - cos_a * center_x + sin_a * center_y],
+            [sin_a, cos_a, center_y - sin_a * center_x - cos_a * center_y]
+        ])
     
     def _generate_line_stitches(self, text: str, width: float, height: float) -> List[Tuple[float, float]]:
         """Generate stitches for straight line text."""
         stitches = []
-        char_width = width / len(text)
+        placements = self.layout_characters(text, 'line', width, height)
         
-        for i, char in enumerate(text):
-            char_x = i * char_width + char_width / 2
-            char_y = height / 2
-            
+        for placement in placements:
             # Generate stitches based on selected font
-            char_stitches = self._generate_character_stitches(char, char_x, char_y, char_width, height)
-            stitches.extend(char_stitches)
+            stitches.extend(self._generate_character_stitches(*placement))
         
         return stitches
     
@@ -144,6 +321,8 @@ class TextEmbroideryConverter:
             stitches = self._script_font_stitches(char, x, y, width, height)
         elif self.current_font == "serif":
             stitches = self._serif_font_stitches(char, x, y, width, height)
+        elif self.current_font == "satin":
+            stitches = self._satin_font_stitches(char, x, y, width, height)
         else:  # default
             stitches = self._default_font_stitches(char, x, y, width, height)
         
@@ -215,6 +394,26 @@ class TextEmbroideryConverter:
         
         return stitches
     
+    def _glyph_strokes(self, char: str, x: float, y: float, width: float, height: float) -> List[List[Tuple[float, float]]]:
+        """Scale a glyph's unit-box centerlines into the character cell centred on (x, y)."""
+        box_width = width * GLYPH_SCALE
+        box_height = height * GLYPH_SCALE
+        left = x - box_width / 2
+        top = y - box_height / 2
+        return [[(left + u * box_width, top + v * box_height) for u, v in stroke] for stroke in glyph_strokes(char)]
+    
+    def _satin_columns(self, strokes: List[List[Tuple[float, float]]]) -> np.ndarray:
+        """Sew centerline strokes as satin columns with the configured width, density and underlay."""
+        return satin_columns(strokes, width=self.satin_width, spacing=self.satin_spacing, underlay=self.satin_underlay)
+    
+    def _satin_stitches(self, strokes: List[List[Tuple[float, float]]]) -> List[Tuple[float, float]]:
+        """Sew centerline strokes as satin columns and return them as a stitch list."""
+        return [tuple(point) for point in self._satin_columns(strokes).tolist()]
+    
+    def _satin_font_stitches(self, char: str, x: float, y: float, width: float, height: float) -> List[Tuple[float, float]]:
+        """Generate satin-column font stitches."""
+        return self._satin_stitches(self._glyph_strokes(char, x, y, width, height))
+    
     def _default_font_stitches(self, char: str, x: float, y: float, width: float, height: float) -> List[Tuple[float, float]]:
         """Generate default font stitches (simple geometric)."""
         stitches = []
@@ -231,28 +430,27 @@ class TextEmbroideryConverter:
     def _generate_circle_stitches(self, text: str, width: float, height: float) -> List[Tuple[float, float]]:
         """Generate stitches for circular text."""
         stitches = []
+        
+        for placement in self.layout_characters(text, 'circle', width, height):
+            stitches.extend(self._circle_character_stitches(*placement))
+        
+        return stitches
+    
+    def _circle_character_stitches(self, char: str, angle: float, width: float, height: float) -> List[Tuple[float, float]]:
+        """Generate stitches for one character placed at an angle on the circle."""
+        stitches = []
         radius = width / 2
         center_x = width / 2
         center_y = height / 2
         
-        # Calculate angle per character
-        angle_per_char = (2 * math.pi) / len(text)
-        
-        for i, char in enumerate(text):
-            angle = i * angle_per_char
-            
-            # Position character on circle
-            char_x = center_x + radius * math.cos(angle)
-            char_y = center_y + radius * math.sin(angle)
+        # Generate stitches around character position
+        for j in range(8):  # 8 stitches per character
+            stitch_angle = angle + (j - 4) * 0.1
+            x = center_x + (radius - 5) * math.cos(stitch_angle)
+            y = center_y + (radius - 5) * math.sin(stitch_angle)
             
-            # Generate stitches around character position
-            for j in range(8):  # 8 stitches per character
-                stitch_angle = angle + (j - 4) * 0.1
-                x = center_x + (radius - 5) * math.cos(stitch_angle)
-                y = center_y + (radius - 5) * math.sin(stitch_angle)
-                
-                if 0 <= x <= width and 0 <= y <= height:
-                    stitches.append((x, y))
+            if 0 <= x <= width and 0 <= y <= height:
+                stitches.append((x, y))
         
         return stitches
     
@@ -331,64 +529,9 @@ class TextEmbroideryConverter:
         return self.current_font
 
 def main():
-    """Test the text to embroidery converter."""
-    converter = TextEmbroideryConverter()
-    
-    print("🧵 Testing Text to Embroidery Converter with Fonts")
-    print("=" * 60)
-    
-    # Test different fonts
-    test_fonts = ["default", "block", "script", "serif"]
-
-    # Create output directory if not exists
-    os.makedirs("output", exist_ok=True)
-    os.chdir("output")
-            
-    # Create a subdirectory for each worker run check if directory exists run_1, run_2, etc.
-    run_dir = "run_1"
-    i = 1
-    while os.path.exists(run_dir):
-        i += 1
-        run_dir = f"run_{i}"
-    os.makedirs(run_dir)
-    os.chdir(run_dir)
-    
-
-    print(f"   (Saved in directory: {os.path.abspath(run_dir)})")
-    
-    for font in test_fonts:
-        print(f"\n📝 Testing Font: {font.upper()}")
-        print("-" * 40)
-        
-        # Set font
-        converter.set_font(font)
-        
-        # Test request
-        request = TextEmbroideryRequest(
-            text="HELLO",
-            shape="line",
-            units="mm",
-            line_length=100,
-            output_formats=["PES"]
-        )
-        
-        try:
-            files = converter.convert_text_to_embroidery(request)
-            print(f"✅ Successfully generated {len(files)} embroidery files:")
-
-            for file in files:
-                # Save to disk for verification (optional)
-                with open(file.filename, 'wb') as f:
-                    f.write(file.content)
-                
-                # Print file info
-                print(f"  - {file.filename} ({len(file.content)} bytes)")
-                
-        except Exception as e:
-            print(f"❌ Error: {e}")
-    
-    print("\n" + "=" * 60)
-    print("🎯 Font testing completed!")
+    """Run the batch converter command-line interface (see batch.py)."""
+    from batch import main as batch_main
+    return batch_main()
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())